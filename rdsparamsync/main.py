@@ -3,17 +3,20 @@ Compare parameters between two databases or parameter groups to catch drift.
 """
 import psycopg2  # Postgres
 import click  # CLI
-import psycopg2.extras  # DictCursor
+import psycopg2.extras  # execute_values
 import colorama  # Pretty colors
 import boto3  # AWS
+import botocore.config
 import os
-import subprocess
-import json
 import re
+import threading
+import time
+import functools
 from tqdm import tqdm
 from diskcache import Cache
 import csv
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from prettytable import PrettyTable  # Pretty table output
 from colorama import Fore
@@ -29,7 +32,15 @@ CACHE_TTL = int(os.environ.get("CACHE_TTL", 3600 * 12))
 colorama.init()
 
 # I think /tmp is common enough.
-cache = Cache("/tmp/pgrdsparamsync")
+# No fsync, losing the cache costs a few AWS calls at worst.
+cache = Cache("/tmp/pgrdsparamsync", sqlite_synchronous=0)
+
+# Turned off with --no-cache.
+use_cache = True
+
+# Created on first use, see _rds().
+_RDS = None
+_RDS_LOCK = threading.Lock()
 
 # We recommend having these values. WIP.
 suggested_parameter_values = {
@@ -42,6 +53,36 @@ suggested_parameter_values = {
     "autovacuum_vacuum_cost_delay": "2",
 }
 
+# The parameter fields RDSParameter uses. The rest is dropped before caching.
+_PARAMETER_FIELDS = (
+    "ParameterName",
+    "ParameterValue",
+    "Description",
+    "DataType",
+    "IsModifiable",
+    "AllowedValues",
+)
+
+# Units normalize() leaves as they are.
+_BASE_UNITS = ("SCALAR", "KB", "MS", "B")
+
+# Units normalize() converts, to kB or ms.
+_UNIT_MULTIPLIERS = {
+    "8KB": 8,
+    "MB": 1024,
+    "16MB": 16 * 1024,
+    "GB": 1024 * 1024,
+    "S": 1000,
+    "MIN": 60 * 1000,
+}
+
+# Bump when RDSParameter.parsed() changes, the cached ones are then ignored.
+PARSED_CACHE_FORMAT = 2
+
+# RDS allowed values range, e.g. "0-100", "-1-262143", "0.1-10" or "0-1.79769e+308"
+_NUMBER = r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?"
+_RANGE_RE = re.compile(r"^({0})-({0})$".format(_NUMBER))
+
 
 def _error(text, exit_on_error=True):
     """Print a nice error to the screen and exit."""
@@ -55,34 +96,96 @@ def _result(text):
     print(Fore.GREEN, "\b{}".format(text), Fore.RESET)
 
 
-def _json(command):
-    """Parse JSON returned by a CLI command."""
-    try:
-        return json.loads(subprocess.check_output(command.split(" ")))
-    except subprocess.CalledProcessError:
-        # Let the CLI output the error
-        exit(1)
+def _cached(key, fetch, expire_with=None):
+    """Get a value from the cache, or fetch it and cache it.
 
+    Arguments:
+        - key: The cache key.
+        - fetch: Function returning the value, called on a cache miss
+                 or when the cache is turned off.
+        - expire_with: Key of the cached value this one is derived from.
+                       It expires with it instead of after CACHE_TTL.
+
+    Return:
+        the cached or fetched value
+    """
+    value = cache.get(key) if use_cache else None
+    if value is None:
+        value = fetch()
+        expire = CACHE_TTL
+        if expire_with is not None:
+            _, expire_time = cache.get(
+                expire_with, default=(None, None), expire_time=True
+            )
+            if expire_time is not None:
+                expire = max(expire_time - time.time(), 0)
+        cache.set(key, value, expire=expire)
+    return value
+
+
+def _rds():
+    """Get the RDS client, shared by all AWS calls in this process."""
+    global _RDS
+    # Clients are thread-safe, creating them is not.
+    with _RDS_LOCK:
+        if _RDS is None:
+            # DescribeDB* calls are throttled aggressively, back off and retry.
+            # Threads share this client, give them enough connections.
+            config = botocore.config.Config(
+                retries={"mode": "adaptive", "max_attempts": 10},
+                max_pool_connections=32,
+                user_agent_extra="pg-rds-params-sync/{}".format(VERSION),
+            )
+            _RDS = boto3.client("rds", config=config)
+    return _RDS
 
-# I don't have to paginate myself, it's nice
+
+@functools.lru_cache(maxsize=None)
 def _parameter_group(name):
-    """Get the Parameter Group from AWS API (or cache). Parse it also.
+    """Get the Parameter Group from AWS API (or cache).
+    Memoized for the life of the process, so don't modify the result.
 
     Arguments:
         - name: Parameter group name
 
     Return:
-        dict from parsed json given by AWS API
+        dict with all the parameters of the group, like the AWS API response
     """
-    cached = cache.get(name)
-    if cached is None:
-        value = _json(
-            "aws rds describe-db-parameters --db-parameter-group-name {}".format(name)
-        )
-        cache.set(name, value, expire=CACHE_TTL)
-        return value
-    else:
-        return cached
+
+    def fetch():
+        paginator = _rds().get_paginator("describe_db_parameters")
+        parameters = []
+        for page in paginator.paginate(DBParameterGroupName=name):
+            for p in page["Parameters"]:
+                parameters.append({k: p[k] for k in _PARAMETER_FIELDS if k in p})
+        return {"Parameters": parameters}
+
+    return _cached(name, fetch)
+
+
+@functools.lru_cache(maxsize=None)
+def _parameter_group_index(name):
+    """Get the parameters of a Parameter Group by name (or cache).
+    Memoized for the life of the process, so don't modify the result.
+
+    Arguments:
+        - name: Parameter group name
+
+    Return:
+        dict of parameter name to class CachedRDSParameter
+    """
+
+    def parse():
+        return {
+            p["ParameterName"]: RDSParameter(p).parsed()
+            for p in _parameter_group(name)["Parameters"]
+        }
+
+    # Cached parsed, so warm runs don't parse again.
+    # Expires with the group it was parsed from, so it's never older.
+    key = "parsed:{}:{}".format(PARSED_CACHE_FORMAT, name)
+    parsed = _cached(key, parse, expire_with=name)
+    return {n: CachedRDSParameter(n, p) for n, p in parsed.items()}
 
 
 def _parameter_group_parameter(parameter_group_name, parameter):
@@ -95,15 +198,11 @@ def _parameter_group_parameter(parameter_group_name, parameter):
     Return:
         class Parameter
     """
-    parameter_groups = RDSParameter.all_parameters(
-        _parameter_group(parameter_group_name)["Parameters"]
-    )
-    try:
-        p = list(filter(lambda x: x.name() == parameter, parameter_groups))[0]
-        return p
-    except IndexError:
+    p = _parameter_group_index(parameter_group_name).get(parameter)
+    if p is None:
         # _error("Parameter {} not found in parameter group {}.".format(parameter, parameter_group_name), exit_on_error=False)
         return UnknownPostgreSQLParameter(parameter)
+    return p
 
 
 def _databases():
@@ -112,13 +211,15 @@ def _databases():
     Return:
         list of dict
     """
-    cached = cache.get("databases")
-    if cached is None:
-        value = _json("aws rds describe-db-instances")
-        cache.set("databases", value, expire=CACHE_TTL)
-        return value
-    else:
-        return cached
+
+    def fetch():
+        paginator = _rds().get_paginator("describe_db_instances")
+        databases = []
+        for page in paginator.paginate():
+            databases.extend(page["DBInstances"])
+        return {"DBInstances": databases}
+
+    return _cached("databases", fetch)
 
 
 def _dbs_and_parameter_groups(skip_without="", exclude_like=None):
@@ -149,8 +250,10 @@ def _dbs_and_parameter_groups(skip_without="", exclude_like=None):
     return result
 
 
+@functools.lru_cache(maxsize=None)
 def _parameter_group_form_db(db_identifier):
     """Get the name of the parameter group configured for a database.
+    Memoized for the life of the process.
 
     Arguments:
         - db_identifier: The identifier of the database as appears
@@ -159,9 +262,7 @@ def _parameter_group_form_db(db_identifier):
     Return:
         str
     """
-    rds = boto3.client("rds")
-
-    response = rds.describe_db_instances(DBInstanceIdentifier=db_identifier)
+    response = _rds().describe_db_instances(DBInstanceIdentifier=db_identifier)
 
     if len(response["DBInstances"]) == 0:
         _error("Database doesn't exist: {}".format(db_identifier))
@@ -172,15 +273,46 @@ def _parameter_group_form_db(db_identifier):
     return db_parameter_group
 
 
-def _find(parameter, parameter_group):
-    """A linear algorithm to find a matching parameter value in a parameter group.
-    Since the number of parameters is low (150-200)...this is not a against decades of search
-    algorithms research."""
-    for p in parameter_group:
-        p = RDSParameter(p)
-        if p.name() == parameter:
-            return p
-    return UnknownPostgreSQLParameter(parameter)
+def _db_parameter_group(db_identifier):
+    """Get the Parameter Group configured for a database.
+
+    Arguments:
+        - db_identifier: The identifier of the database as appears
+                         in RDS console.
+
+    Return:
+        dict, see _parameter_group()
+    """
+    return _parameter_group(_parameter_group_form_db(db_identifier))
+
+
+def _parameter_groups_form_dbs(db_identifiers):
+    """Get the names of the parameter groups configured for several databases
+    in one API call.
+
+    Arguments:
+        - db_identifiers: The identifiers of the databases as they appear
+                          in RDS console.
+
+    Return:
+        dict of lowercase database identifier to parameter group name
+    """
+    # RDS stores identifiers lowercase and the filter is case sensitive.
+    db_identifiers = [db_identifier.lower() for db_identifier in db_identifiers]
+    response = _rds().describe_db_instances(
+        Filters=[{"Name": "db-instance-id", "Values": db_identifiers}]
+    )
+
+    result = {}
+    for db_instance in response["DBInstances"]:
+        parameter_group = db_instance["DBParameterGroups"][0]["DBParameterGroupName"]
+        result[db_instance["DBInstanceIdentifier"].lower()] = parameter_group
+
+    for db_identifier in db_identifiers:
+        if db_identifier not in result:
+            _error("Database doesn't exist: {}".format(db_identifier))
+
+    return result
 
 
 def _exec(cur, query, params=None):
@@ -189,11 +321,38 @@ def _exec(cur, query, params=None):
     return cur
 
 
+def _settings_diff(cur, params):
+    """Compare the settings of a database to the given settings.
+    The comparison runs in the database, so only the differences
+    are sent back. Settings missing on one side have a None setting.
+
+    Arguments:
+        - cur: Cursor of the database to compare.
+        - params: list of PostgreSQLParameter to compare it to.
+
+    Return:
+        list of (name, setting_a, setting_b, unit)
+    """
+    values = [(p.name(), p.data["setting"], p.data["unit"]) for p in params]
+    return psycopg2.extras.execute_values(
+        cur,
+        """SELECT name, s.setting, v.setting, COALESCE(s.unit, v.unit)
+        FROM pg_settings s
+        FULL JOIN (VALUES %s) AS v(name, setting, unit) USING (name)
+        WHERE (s.setting, COALESCE(s.unit, ''))
+            IS DISTINCT FROM (v.setting, COALESCE(v.unit, ''))
+        ORDER BY name""",
+        values,
+        page_size=len(values),  # One round trip
+        fetch=True,
+    )
+
+
 def _conn(db_url):
     """Create a connection to a database."""
     conn = psycopg2.connect(db_url)
     conn.set_session(autocommit=True)
-    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    cur = conn.cursor()
 
     return conn, cur
 
@@ -201,9 +360,15 @@ def _conn(db_url):
 class Parameter:
     """Base class representing a database configuration parameter."""
 
+    # Instances never go in the disk cache (see RDSParameter.parsed()),
+    # so the layout can change freely.
+    __slots__ = ("data", "_key")
+
     def __init__(self, data):
         assert data is not None
         self.data = data
+        # Computed once, this is compared a lot. See __eq__.
+        self._key = (self.name(), self.value(), self.unit())
 
     ### Have to be implemented methods.
     def name(self):
@@ -230,43 +395,27 @@ class Parameter:
             return None  # Default
 
         unit = self.unit()
-        if unit == "SCALAR":
-            return self.value()
-        elif unit == "KB":
-            return self.value()
-        elif unit == "MS":
-            return self.value()
-        elif unit == "B":
+        if unit in _BASE_UNITS:
             return self.value()
-        elif unit == "8KB":
-            return str(int(self.value()) * 8)
-        elif unit == "MB":
-            return str(int(self.value() * 1024))
-        elif unit == "16MB":
-            return str(int(self.value()) * 16 * 1024)
-        elif unit == "GB":
-            return str(int(self.value()) * 1024 * 1024)
-        elif unit == "S":
-            return str(int(self.value()) * 1000)  # ms
-        elif unit == "MIN":
-            return str(int(self.value()) * 60 * 1000)  # ms
+        elif unit in _UNIT_MULTIPLIERS:
+            return str(int(self.value()) * _UNIT_MULTIPLIERS[unit])
         else:
             raise ValueError(
                 "Unsupported unit {} for parameter {}".format(unit, self.name())
             )
 
     def __eq__(self, other):
-        return (
-            self.unit() == other.unit()
-            and self.value() == other.value()
-            and self.name() == other.name()
-        )
+        # Name first, value second: tuples compare item by item
+        # and stop at the first difference.
+        return self._key == other._key
 
 
 class RDSParameter(Parameter):
     """Represents a parameter retrieved from AWS CLI.
     It parses a lot of useful info."""
 
+    __slots__ = ()
+
     def name(self):
         return self.data["ParameterName"]
 
@@ -280,12 +429,13 @@ class RDSParameter(Parameter):
         return self.data["DataType"]
 
     def unit(self):
-        """Extract the unit RDS is using for this metric."""
-        result = re.search(r"^\((.*)\).*", self.data["Description"])
-        try:
-            return result.group(1).upper()  # Exclude ( and )
-        except (IndexError, AttributeError):
+        """Extract the unit RDS is using for this metric.
+        It's in front of the description, e.g. "(8kB) Sets the number..."."""
+        description = self.data["Description"]
+        end = description.find(")")
+        if not description.startswith("(") or end < 0:
             return "SCALAR"
+        return description[1:end].upper()  # Exclude ( and )
 
     def is_modifiable(self):
         return self.data["IsModifiable"]
@@ -293,37 +443,88 @@ class RDSParameter(Parameter):
     def allowed_values(self):
         if not self.is_modifiable():
             return None
-        elif "," in self.data["AllowedValues"]:
-            return self.data["AllowedValues"].split(",")
-        elif "-" in self.data["AllowedValues"]:
-            t = self.data["AllowedValues"].split("-")
-            # Handle negative values
-            if self.data["AllowedValues"].startswith("-"):
-                return ["-" + t[1], t[2]]
-            else:
-                return t
-        else:
+
+        allowed_values = self.data["AllowedValues"]
+        if "," in allowed_values:
+            return allowed_values.split(",")
+
+        result = _RANGE_RE.match(allowed_values)
+        if result is None:
             raise AttributeError(
-                "Insupported AllowedValues field: {}".format(self.data["AllowedValues"])
+                "Insupported AllowedValues field: {}".format(allowed_values)
             )
+        return [result.group(1), result.group(2)]
 
     def normalize(self):
+        # Engine default, the actual value isn't in the parameter group.
+        if "ParameterValue" not in self.data:
+            return None
+
         # We cannot deduce template arguments easily...
         # TODO: figure this out
-        if any(x in str(self.value()) for x in ["{", "}"]):
+        value = self.value()
+        if "{" in value or "}" in value:
             return None
         else:
-            super().normalize()
+            return super().normalize()
+
+    def parsed(self):
+        """The parsed parameter as a tuple of builtins, safe to cache.
+        See CachedRDSParameter."""
+        try:
+            allowed_values = self.allowed_values()
+        except (AttributeError, KeyError):
+            allowed_values = None  # Not something we can parse
+        if allowed_values is not None:
+            allowed_values = tuple(allowed_values)
+        return (self.value(), self.unit(), self.is_modifiable(), allowed_values)
 
     @classmethod
     def all_parameters(cls, parameters):
-        return list(map(lambda x: cls(x), parameters))
+        return [cls(x) for x in parameters]
+
+
+class CachedRDSParameter(Parameter):
+    """Represents a parameter rebuilt from RDSParameter.parsed().
+    Only builtins are cached, so changing these classes can't break the cache."""
+
+    __slots__ = ()
+
+    def __init__(self, name, parsed):
+        super().__init__((name,) + tuple(parsed))
+
+    def name(self):
+        return self.data[0]
+
+    def value(self):
+        return self.data[1]
+
+    def unit(self):
+        return self.data[2]
+
+    def is_modifiable(self):
+        return self.data[3]
+
+    def allowed_values(self):
+        if self.data[4] is None:
+            return None
+        return list(self.data[4])
+
+    def normalize(self):
+        # Engine default or template, see RDSParameter.normalize().
+        value = self.value()
+        if value == "Engine default" or "{" in value or "}" in value:
+            return None
+        else:
+            return super().normalize()
 
 
 class PostgreSQLParameter(Parameter):
     """Represents a parameter retrieved directly
     from the PostgreSQL database."""
 
+    __slots__ = ()
+
     def name(self):
         return self.data["name"]
 
@@ -340,7 +541,10 @@ class PostgreSQLParameter(Parameter):
         return False  # Can't modify anything in PG/RDS
 
     def allowed_values(self):
-        return [str(self.data["min_value"]), str(self.data["max_value"])]
+        try:
+            return [str(self.data["min_val"]), str(self.data["max_val"])]
+        except KeyError:
+            return []  # Not selected, see all_settings()
 
     def normalize(self):
         # Handle boolean
@@ -354,26 +558,48 @@ class PostgreSQLParameter(Parameter):
     @classmethod
     def from_db(cls, name, conn):
         """Get and parse the parameter from the database."""
-        param = _exec(
-            conn, "SELECT * FROM pg_settings WHERE name = %s", (name,)
-        ).fetchone()
+        cur = _exec(conn, "SELECT * FROM pg_settings WHERE name = %s", (name,))
+        param = cur.fetchone()
         if param is None:
             print("Unknown parameter: {}".format(name))
             return UnknownPostgreSQLParameter(name)
         else:
-            return cls(param)
+            columns = [column[0] for column in cur.description]
+            return cls(dict(zip(columns, param)))
+
+    @classmethod
+    def many_from_db(cls, names, conn):
+        """Get and parse several parameters from the database in one query.
+        Returned in the same order as names."""
+        names = list(names)  # Read twice, could be a generator
+        params = _exec(
+            conn,
+            "SELECT name, setting, unit FROM pg_settings WHERE name = ANY(%s)",
+            (names,),
+        ).fetchall()
+        params = {
+            name: cls({"name": name, "setting": setting, "unit": unit})
+            for name, setting, unit in params
+        }
+        return [params.get(name) or UnknownPostgreSQLParameter(name) for name in names]
 
     @classmethod
     def all_settings(cls, conn):
-        """Get and parse all parameters from the database."""
-        params = _exec(conn, "SELECT * FROM pg_settings").fetchall()
-        return list(map(lambda x: cls(x), params))
+        """Get and parse all parameters from the database.
+        Only the columns used for comparing are selected."""
+        params = _exec(conn, "SELECT name, setting, unit FROM pg_settings").fetchall()
+        return [
+            cls({"name": name, "setting": setting, "unit": unit})
+            for name, setting, unit in params
+        ]
 
 
 class UnknownPostgreSQLParameter(PostgreSQLParameter):
     """Represents an unknown PostgreSQL parameter. Effectively
     the "is None" case."""
 
+    __slots__ = ()
+
     def __init__(self, name):
         super().__init__({"name": name})
 
@@ -392,8 +618,15 @@ class UnknownPostgreSQLParameter(PostgreSQLParameter):
 
 # CLI
 @click.group()
-def main():
-    pass
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Fetch everything from AWS again instead of using the local cache.",
+)
+def main(no_cache):
+    global use_cache
+    use_cache = not no_cache
 
 
 @main.command()
@@ -436,17 +669,20 @@ def audit(parameter, db_name_like, db_name_not_like, value_not_like, fmt, show_a
     # Fetch all DBs and their parameter group names
     dbs = _dbs_and_parameter_groups(db_name_like, db_name_not_like)
 
-    headers = ["DB", "Parameter Group", parameter, "Suggested Value"]
-
-    # For pretty table
-    table = PrettyTable(headers)
+    # Fetch each parameter group once, a few at a time.
+    # Not too many, DescribeDBParameters is throttled.
+    parameter_groups = {settings["DBParameterGroupName"] for settings in dbs.values()}
+    with ThreadPoolExecutor(8) as executor:
+        fetches = [executor.submit(_parameter_group_index, p) for p in parameter_groups]
+        for fetch in tqdm(
+            as_completed(fetches), total=len(fetches), disable=(fmt == CSV)
+        ):
+            fetch.result()  # Raise errors right away
 
-    # For CSV output
-    file = StringIO()
-    writer = csv.writer(file)
-    writer.writerow(headers)
+    headers = ["DB", "Parameter Group", parameter, "Suggested Value"]
+    rows = []
 
-    for name, settings in tqdm(dbs.items(), disable=(fmt == CSV)):
+    for name, settings in dbs.items():
         parameter_group, engine_version = (
             settings["DBParameterGroupName"],
             settings["EngineVersion"],
@@ -474,19 +710,23 @@ def audit(parameter, db_name_like, db_name_not_like, value_not_like, fmt, show_a
             continue
 
         row += ["{} ({})".format(param.value(), param.unit().lower()), suggested_value]
-        if fmt == CSV:
-            writer.writerow(row)
-        else:
-            table.add_row(row)
+        rows.append(row)
 
     if fmt == CSV:
+        file = StringIO()
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        writer.writerows(rows)
         print(file.getvalue())
+
+        # Flush
+        file.close()
     else:
+        table = PrettyTable(headers)
+        for row in rows:
+            table.add_row(row)
         print(table)
 
-    # Flush
-    file.close()
-
 
 # TODO: Figure out how to get creds automatically based on database identifier.
 @main.command()
@@ -498,11 +738,11 @@ def audit(parameter, db_name_like, db_name_not_like, value_not_like, fmt, show_a
 )
 def pg_compare(target_db_url, other_db_url):
     """Compare target DB to other DB using PostgreSQL settings."""
-    ca, ra = _conn(target_db_url)
-    cb, rb = _conn(other_db_url)
-
-    params_a = PostgreSQLParameter.all_settings(ra)
-    params_b = PostgreSQLParameter.all_settings(rb)
+    # Connecting (TLS, auth) takes a few round trips, do both at the same time.
+    with ThreadPoolExecutor(2) as executor:
+        fa = executor.submit(_conn, target_db_url)
+        fb = executor.submit(_conn, other_db_url)
+        (ca, ra), (cb, rb) = fa.result(), fb.result()
 
     host_a = ca.get_dsn_parameters()["host"]
     host_b = cb.get_dsn_parameters()["host"]
@@ -510,28 +750,19 @@ def pg_compare(target_db_url, other_db_url):
     if host_a == host_b:
         _error("Target database and other database are the same database.")
 
-    table = PrettyTable(
-        [
-            "Name",
-            ca.get_dsn_parameters()["host"],
-            cb.get_dsn_parameters()["host"],
-            "Unit",
-        ]
-    )
+    # Send the other DB's settings to the target DB and diff them there.
+    params_b = PostgreSQLParameter.all_settings(rb)
+    diff = _settings_diff(ra, params_b)
 
-    diff = 0
-    for a in params_a:
-        for b in params_b:
-            if a.name() == b.name():
-                if a != b:
-                    diff += 1
-                    table.add_row(
-                        [a.name(), a.value()[:50], b.value()[:50], a.unit().lower()]
-                    )
-
-    if diff == 0:
+    if len(diff) == 0:
         _result("No differences.")
     else:
+        table = PrettyTable(["Name", host_a, host_b, "Unit"])
+        for name, setting_a, setting_b, unit in diff:
+            setting_a = "Unknown" if setting_a is None else setting_a[:50]
+            setting_b = "Unknown" if setting_b is None else setting_b[:50]
+            unit = (unit or "scalar").lower()
+            table.add_row([name, setting_a, setting_b, unit])
         print(table)
 
 
@@ -545,31 +776,57 @@ def pg_compare(target_db_url, other_db_url):
 @click.option("--other-db", required=False, help="Database to compare to.")
 def rds_compare(target_db, parameter_group, other_db):
     """Compare target DB to other DB using Parameter Groups."""
-    parameter_group_a = _parameter_group(_parameter_group_form_db(target_db))[
-        "Parameters"
-    ]
+    # Fetch both sides at the same time, each side chaining its own AWS calls.
+    with ThreadPoolExecutor(2) as executor:
+        if parameter_group is None and other_db is not None:
+            # Look up both databases in one call.
+            groups = _parameter_groups_form_dbs([target_db, other_db])
+            group_a, group_b = groups[target_db.lower()], groups[other_db.lower()]
+            fa = executor.submit(_parameter_group, group_a)
+            if group_b == group_a:
+                # Same group, lru_cache doesn't dedupe calls still in flight.
+                fb = fa
+            else:
+                fb = executor.submit(_parameter_group, group_b)
+        elif parameter_group is not None:
+            fa = executor.submit(_db_parameter_group, target_db)
+            fb = executor.submit(_parameter_group, parameter_group)
+        else:
+            _error("--parameter-group or --other-db is required.")
 
-    if parameter_group is None and other_db is not None:
-        parameter_group_b = _parameter_group(_parameter_group_form_db(other_db))[
-            "Parameters"
-        ]
-    elif parameter_group is not None:
-        parameter_group_b = _parameter_group(parameter_group)["Parameters"]
-    else:
-        _error("--parameter-group or --other-db is required.")
+        parameter_group_a = fa.result()["Parameters"]
+        parameter_group_b = fb.result()["Parameters"]
 
-    table = PrettyTable(["Name", target_db, (parameter_group or other_db), "Unit"])
+    parameter_group_b = {p["ParameterName"]: p for p in parameter_group_b}
 
-    diffs = 0
+    rows = []
     for a in parameter_group_a:
+        b = parameter_group_b.get(a["ParameterName"])
+
+        # Engine default on both sides, nothing to compare.
+        if b is not None and "ParameterValue" not in a and "ParameterValue" not in b:
+            continue
+
         a = RDSParameter(a)
-        b = _find(a.name(), parameter_group_b)
+        if b is None:
+            b = UnknownPostgreSQLParameter(a.name())
+        else:
+            b = RDSParameter(b)
 
         if a != b:
-            diffs += 1
-            table.add_row([a.name(), a.value()[:50], b.value()[:50], a.unit()])
+            rows.append([a.name(), a.value()[:50], b.value()[:50], a.unit()])
 
-    if diffs == 0:
+    # Parameters only the other side has.
+    names_a = {p["ParameterName"] for p in parameter_group_a}
+    for name, b in parameter_group_b.items():
+        if name not in names_a:
+            b = RDSParameter(b)
+            rows.append([name, "Unknown", b.value()[:50], b.unit()])
+
+    if len(rows) == 0:
         _result("No differences.")
     else:
+        table = PrettyTable(["Name", target_db, (parameter_group or other_db), "Unit"])
+        for row in rows:
+            table.add_row(row)
         print(table)
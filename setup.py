@@ -19,7 +19,7 @@ setuptools.setup(
         'prettytable>=0.7.2',
         'psycopg2>=2.8.4',
         'diskcache>=4.1.0',
-        'boto3>=1.11.9',
+        'boto3>=1.12.0',
         'tqdm>=4.46.0',
     ],
     extras_require={
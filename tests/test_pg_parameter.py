@@ -2,6 +2,7 @@ import pytest
 import psycopg2
 import psycopg2.extras
 from rdsparamsync import PostgreSQLParameter
+from rdsparamsync.main import _settings_diff
 
 @pytest.fixture()
 def cursor():
@@ -24,6 +25,7 @@ def test_vacuum_cost_delay(cursor):
     assert param.normalize() == row['setting']
     assert param.unit() == 'MS'
     assert param.is_modifiable() == False
+    assert param.allowed_values() == [row['min_val'], row['max_val']]
 
 
 def test_wal_buffers(cursor):
@@ -51,3 +53,41 @@ def test_eq(cursor):
     p3 = PostgreSQLParameter(setting(cursor, 'vacuum_cost_delay'))
 
     assert p1 != p3
+
+def test_all_settings(cursor):
+    params = PostgreSQLParameter.all_settings(cursor)
+    wal_buffers = [p for p in params if p.name() == 'wal_buffers'][0]
+
+    assert wal_buffers == PostgreSQLParameter(setting(cursor, 'wal_buffers'))
+    assert wal_buffers.allowed_values() == []
+
+def test_many_from_db(cursor):
+    names = ['wal_buffers', 'not_a_setting', 'vacuum_cost_delay']
+    params = PostgreSQLParameter.many_from_db(names, cursor)
+
+    assert [p.name() for p in params] == names
+    assert params[0] == PostgreSQLParameter(setting(cursor, 'wal_buffers'))
+    assert params[1].value() == 'Unknown'
+    assert params[2] == PostgreSQLParameter(setting(cursor, 'vacuum_cost_delay'))
+
+def test_many_from_db_generator(cursor):
+    params = PostgreSQLParameter.many_from_db((n for n in ['wal_buffers']), cursor)
+
+    assert [p.name() for p in params] == ['wal_buffers']
+
+def test_settings_diff(cursor):
+    params = PostgreSQLParameter.all_settings(cursor)
+    # One missing, one changed, one extra
+    params = [p for p in params if p.name() not in ('wal_buffers', 'work_mem')]
+    params.append(PostgreSQLParameter({'name': 'work_mem', 'setting': '1', 'unit': 'kB'}))
+    params.append(PostgreSQLParameter({'name': 'not_a_setting', 'setting': 'on', 'unit': None}))
+
+    rows = [tuple(row) for row in _settings_diff(cursor, params)]
+    wal_buffers = setting(cursor, 'wal_buffers')
+    work_mem = setting(cursor, 'work_mem')
+
+    assert rows == [
+        ('not_a_setting', None, 'on', None),
+        ('wal_buffers', wal_buffers['setting'], None, wal_buffers['unit']),
+        ('work_mem', work_mem['setting'], '1', 'kB'),
+    ]
@@ -1,6 +1,10 @@
 import pytest
 import json
-from rdsparamsync import RDSParameter
+import pickle
+import importlib
+from click.testing import CliRunner
+from diskcache import Cache
+from rdsparamsync import RDSParameter, CachedRDSParameter
 
 parameter_group_values = {
     'wal_buffers':
@@ -45,6 +49,21 @@ parameter_group_values = {
         "ApplyMethod": "pending-reboot"
     }
     """,
+
+    'autovacuum_naptime':
+    """
+    {
+        "ParameterName": "autovacuum_naptime",
+        "ParameterValue": "15",
+        "Description": "(s) Time to sleep between autovacuum runs (per database).",
+        "Source": "user",
+        "ApplyType": "dynamic",
+        "DataType": "integer",
+        "AllowedValues": "1-2147483",
+        "IsModifiable": true,
+        "ApplyMethod": "pending-reboot"
+    }
+    """,
 }
 
 def test_vacuum_cost_delay():
@@ -72,7 +91,40 @@ def test_wal_buffers():
     assert param.is_modifiable() == True
     assert param.allowed_values() == ['-1', '262143']
     assert param.unit() == '8KB'
-    # assert param.normalize() == '-1'
+    assert param.normalize() == '-1'
+
+def test_autovacuum_naptime():
+    param = RDSParameter(json.loads(parameter_group_values['autovacuum_naptime']))
+
+    assert param.value() == '15'
+    assert param.unit() == 'S'
+    assert param.normalize() == '15000'
+
+def test_allowed_values_range():
+    param = RDSParameter(json.loads(parameter_group_values['autovacuum_naptime']))
+
+    for allowed_values, expected in [
+        ('-1-2147483647', ['-1', '2147483647']),
+        ('-100-100', ['-100', '100']),
+        ('0.1-10', ['0.1', '10']),
+        ('0-1.79769e+308', ['0', '1.79769e+308']),
+    ]:
+        param.data['AllowedValues'] = allowed_values
+        assert param.allowed_values() == expected
+
+    param.data['AllowedValues'] = 'off-on'
+    with pytest.raises(AttributeError):
+        param.allowed_values()
+
+def test_normalize_mb():
+    param = RDSParameter({
+        'ParameterName': 'max_wal_size',
+        'ParameterValue': '2048',
+        'Description': '(MB) Sets the WAL size that triggers a checkpoint.',
+    })
+
+    assert param.unit() == 'MB'
+    assert param.normalize() == str(2048 * 1024)
 
 def test_eq():
     p1 = RDSParameter(json.loads(parameter_group_values['wal_compression']))
@@ -83,3 +135,75 @@ def test_eq():
     p3 = RDSParameter(json.loads(parameter_group_values['wal_buffers']))
 
     assert p1 != p3
+
+def test_cached():
+    for name, value in parameter_group_values.items():
+        param = RDSParameter(json.loads(value))
+        cached = CachedRDSParameter(name, pickle.loads(pickle.dumps(param.parsed())))
+
+        assert cached == param
+        assert cached.is_modifiable() == param.is_modifiable()
+        assert cached.allowed_values() == param.allowed_values()
+        assert cached.normalize() == param.normalize()
+
+def test_parsed_builtins():
+    # Cached on disk, must not depend on our classes.
+    for value in parameter_group_values.values():
+        parsed = RDSParameter(json.loads(value)).parsed()
+        builtins = (str, bool, tuple, type(None))
+
+        assert type(parsed) is tuple
+        assert all(type(x) in builtins for x in parsed)
+        assert all(type(x) is str for x in parsed[3] or ())
+
+def test_rds_compare(monkeypatch):
+    main = importlib.import_module('rdsparamsync.main')
+    groups = {
+        'group-a': [
+            {'ParameterName': 'work_mem', 'ParameterValue': '4096', 'Description': '(kB) Work memory.'},
+            # Engine default on both sides, skipped even though the units differ.
+            {'ParameterName': 'both_default', 'Description': '(ms) Default.'},
+            {'ParameterName': 'default_a', 'Description': 'Default on a only.'},
+            {'ParameterName': 'only_a', 'ParameterValue': '1', 'Description': 'Only on a.'},
+        ],
+        'group-b': [
+            {'ParameterName': 'work_mem', 'ParameterValue': '8192', 'Description': '(kB) Work memory.'},
+            {'ParameterName': 'both_default', 'Description': '(s) Default.'},
+            {'ParameterName': 'default_a', 'ParameterValue': '2', 'Description': 'Default on a only.'},
+            {'ParameterName': 'only_b', 'ParameterValue': '3', 'Description': 'Only on b.'},
+        ],
+    }
+    monkeypatch.setattr(main, '_parameter_groups_form_dbs', lambda ids: {'db-a': 'group-a', 'db-b': 'group-b'})
+    monkeypatch.setattr(main, '_parameter_group', lambda name: {'Parameters': groups[name]})
+
+    result = CliRunner().invoke(main.main, ['rds-compare', '--target-db', 'db-a', '--other-db', 'db-b'])
+    rows = [
+        [cell.strip() for cell in line.strip('|').split('|')]
+        for line in result.output.splitlines()
+        if line.startswith('|')
+    ]
+
+    assert result.exit_code == 0
+    assert rows == [
+        ['Name', 'db-a', 'db-b', 'Unit'],
+        ['work_mem', '4096', '8192', 'KB'],
+        ['default_a', 'Engine default', '2', 'SCALAR'],
+        ['only_a', '1', 'Unknown', 'SCALAR'],
+        ['only_b', 'Unknown', '3', 'SCALAR'],
+    ]
+
+def test_parsed_expires_with_group(monkeypatch, tmp_path):
+    main = importlib.import_module('rdsparamsync.main')
+    monkeypatch.setattr(main, 'cache', Cache(str(tmp_path)))
+    group = {'Parameters': [json.loads(parameter_group_values['wal_buffers'])]}
+    # Written a while ago, e.g. by rds-compare.
+    main.cache.set('group', group, expire=60)
+    monkeypatch.setattr(main, '_parameter_group', lambda name: main.cache.get(name))
+
+    index = main._parameter_group_index.__wrapped__('group')
+
+    assert index['wal_buffers'] == RDSParameter(group['Parameters'][0])
+    _, group_expire_time = main.cache.get('group', expire_time=True)
+    key = 'parsed:{}:group'.format(main.PARSED_CACHE_FORMAT)
+    _, parsed_expire_time = main.cache.get(key, expire_time=True)
+    assert parsed_expire_time == pytest.approx(group_expire_time, abs=1)